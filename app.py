@@ -1,11 +1,15 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import json
-import openai
+import numpy as np
+import pyarrow as pa
+import orjson
+import csv
+import io
+import os
 import re
-import jsonschema
-from jsonschema import validate
+import threading
+import time
+import zlib
 
 # -------------------- Configuration --------------------
 
@@ -25,80 +29,216 @@ BENCHMARKS = {
     }
 }
 
-# Initialize session state variables
-if "survey_completed" not in st.session_state:
-    st.session_state.survey_completed = False
-st.session_state.kpi_suggestions = st.session_state.get("kpi_suggestions", {})
-st.session_state.selected_kpis = st.session_state.get("selected_kpis", [])
-st.session_state.kpi_data = st.session_state.get("kpi_data", {})
-st.session_state.kpi_explanations = st.session_state.get("kpi_explanations", {})
-st.session_state.phase_outputs = st.session_state.get("phase_outputs", {})
-st.session_state.selected_kpis_struct = st.session_state.get("selected_kpis_struct", {})
-st.session_state.survey_responses = st.session_state.get("survey_responses", {})
+# Initialize session state variables once per session
+if "initialized" not in st.session_state:
+    st.session_state.update({
+        "survey_completed": False,
+        "kpi_suggestions": {},
+        "selected_kpis": [],
+        "kpi_data": {},
+        "kpi_arrow": {},
+        "kpi_figures": {},
+        "phase_outputs": {},
+        "selected_kpis_struct": {},
+        "survey_responses": {},
+        "export_payloads": {},
+        "initialized": True,
+    })
+
+# -------------------- KPI Data Store --------------------
+
+# Each KPI's data points are kept column-wise: a list of period labels plus growable
+# float64 value and int64 month-number arrays (only the first `n` slots are filled),
+# alongside an Arrow table and a Plotly figure that are refreshed only when the data changes
+KPI_ARROW_SCHEMA = pa.schema([("Time Period", pa.string()), ("Value", pa.float64())])
+KPI_BUFFER_CAPACITY = 64
+# Month numbers are clamped here (the largest integer float64 holds exactly) so they always fit int64
+MAX_PERIOD_NUMBER = 2 ** 53
+
+def period_numbers(periods):
+    """Extract the month number from each 'Month X' label (0 when a label has no number)."""
+    # ASCII digits only: \d would also match e.g. Arabic-Indic digits, which to_numeric can't parse
+    numbers = pd.to_numeric(
+        pd.Series(periods, dtype=str).str.extract(r'([0-9]+)', expand=False), errors="coerce"
+    ).astype(np.float64)
+    return numbers.fillna(0).clip(upper=MAX_PERIOD_NUMBER).to_numpy(dtype=np.int64)
+
+def _refresh_kpi_views(kpi_name):
+    """Rebuild the Arrow table and update the persistent chart after a KPI's data changes."""
+    periods, values, months = get_kpi_series(kpi_name)
+    st.session_state.kpi_arrow[kpi_name] = pa.Table.from_arrays(
+        [pa.array(periods, type=pa.string()), pa.array(values)], schema=KPI_ARROW_SCHEMA
+    )
+    # The figure is built once per KPI; later changes only swap its trace data
+    if kpi_name not in st.session_state.kpi_figures:
+        st.session_state.kpi_figures[kpi_name] = build_kpi_chart(kpi_name)
+    update_kpi_chart(st.session_state.kpi_figures[kpi_name], periods, values, months)
+
+def set_kpi_data(kpi_name, df):
+    """Replace the stored data points for a KPI with the rows of a DataFrame."""
+    periods = df["Time Period"].astype(str).tolist()
+    st.session_state.kpi_data[kpi_name] = {
+        "t": periods,
+        "v": np.array(df["Value"], dtype=np.float64),
+        "m": period_numbers(periods),
+        "n": len(periods),
+    }
+    _refresh_kpi_views(kpi_name)
+
+def append_kpi_data_point(kpi_name, time_period, value):
+    """Append a single data point to a KPI's stored data, doubling the buffers when full."""
+    # Parse the month number once here rather than on every plot, before any state is touched
+    month = period_numbers([time_period])[0]
+    buf = st.session_state.kpi_data.setdefault(kpi_name, {
+        "t": [],
+        "v": np.empty(KPI_BUFFER_CAPACITY, dtype=np.float64),
+        "m": np.empty(KPI_BUFFER_CAPACITY, dtype=np.int64),
+        "n": 0,
+    })
+    n = buf["n"]
+    if n == len(buf["v"]):
+        capacity = max(2 * n, KPI_BUFFER_CAPACITY)
+        buf["v"] = np.resize(buf["v"], capacity)
+        buf["m"] = np.resize(buf["m"], capacity)
+    buf["t"].append(time_period)
+    buf["v"][n] = value
+    buf["m"][n] = month
+    buf["n"] = n + 1
+    _refresh_kpi_views(kpi_name)
+
+def get_kpi_series(kpi_name):
+    """Return a KPI's (period labels, values, month numbers), with the arrays as views of the filled slots."""
+    buf = st.session_state.kpi_data[kpi_name]
+    n = buf["n"]
+    return buf["t"], buf["v"][:n], buf["m"][:n]
+
+def get_kpi_table(kpi_name):
+    """Return the precomputed Arrow table of a KPI's data points for st.dataframe."""
+    return st.session_state.kpi_arrow[kpi_name]
+
+def get_kpi_chart(kpi_name):
+    """Return the persistent Plotly figure holding a KPI's current data points."""
+    return st.session_state.kpi_figures[kpi_name]
 
 # -------------------- Export Functions --------------------
 
+# Exports are cached on the KPI list's contents so reruns don't re-serialize an unchanged selection
+
+@st.cache_data(show_spinner=False)
 def export_kpis_csv(kpi_list):
     """Export KPIs as a CSV file."""
-    df = pd.DataFrame(kpi_list)
-    return df.to_csv(index=False).encode('utf-8')
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=["name", "description", "guidance"], lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(kpi_list)
+    return buf.getvalue().encode('utf-8')
 
+@st.cache_data(show_spinner=False)
 def export_kpis_json(kpi_list):
     """Export KPIs as JSON file."""
     try:
-        json_str = json.dumps(kpi_list, indent=4)
-        return json_str.encode('utf-8')
+        # orjson serializes straight to UTF-8 bytes, skipping the str -> bytes encode
+        return orjson.dumps(kpi_list, option=orjson.OPT_INDENT_2)
     except TypeError as e:
         st.error(f"Error exporting KPIs to JSON: {e}")
         return b""
 
+@st.cache_data(show_spinner=False)
 def export_kpis_text(kpi_list):
     """Export KPIs as a plain text file."""
-    text_lines = []
+    # Encode each block straight into one buffer rather than joining a full str and encoding it again
+    buf = io.BytesIO()
+    write = buf.write
     for kpi in kpi_list:
-        text_lines.append(f"KPI: {kpi['name']}")
-        text_lines.append(f"Description: {kpi['description']}")
-        text_lines.append(f"Guidance: {kpi['guidance']}\n")
-    return "\n".join(text_lines).encode('utf-8')
+        write(f"KPI: {kpi['name']}\nDescription: {kpi['description']}\nGuidance: {kpi['guidance']}\n\n".encode('utf-8'))
+    return buf.getvalue()
+
+# -------------------- Upload Functions --------------------
+
+# Columns an uploaded KPI file must provide (matched case-insensitively)
+UPLOAD_COLUMNS = {"time_period", "value"}
+
+def read_uploaded_kpi_data(uploaded_file):
+    """Read an uploaded CSV/XLSX file, keeping only the KPI columns with lower-cased names."""
+    def is_kpi_column(col):
+        return str(col).lower() in UPLOAD_COLUMNS
+
+    if uploaded_file.name.endswith(".csv"):
+        try:
+            # pyarrow's multithreaded parser is much faster than the default C engine
+            df = pd.read_csv(uploaded_file, engine="pyarrow")
+        except (ImportError, ValueError):
+            uploaded_file.seek(0)
+            df = pd.read_csv(uploaded_file, usecols=is_kpi_column)
+    else:
+        try:
+            # calamine (Rust) reads xlsx several times faster than openpyxl
+            df = pd.read_excel(uploaded_file, engine="calamine", usecols=is_kpi_column)
+        except (ImportError, ValueError):
+            uploaded_file.seek(0)
+            df = pd.read_excel(uploaded_file, usecols=is_kpi_column)
+
+    df.columns = df.columns.astype(str).str.lower()
+    return df[[col for col in df.columns if col in UPLOAD_COLUMNS]]
 
 # -------------------- Plotting Function --------------------
 
-def plot_kpi_chart(kpi_name, data_points):
-    """Generate an interactive and enhanced trend chart for a specific KPI using Plotly."""
-    # Debug: Display the data being plotted
-    st.write(f"### Debug: Data Points for '{kpi_name}'")
-    st.dataframe(data_points)
-    
-    # Extract numerical month for proper sorting
-    def extract_month_number(time_period):
-        match = re.search(r'(\d+)', time_period)
-        return int(match.group(1)) if match else 0
-
-    data_points['Month_Number'] = data_points['Time Period'].apply(extract_month_number)
-    
-    # Sort by month number
-    data_points = data_points.sort_values('Month_Number')
-    
-    # Ensure 'Time Period' is ordered correctly
-    data_points['Time Period'] = pd.Categorical(
-        data_points['Time Period'],
-        categories=data_points['Time Period'],
-        ordered=True
-    )
-    
-    # Create the line chart
-    fig = px.line(
-        data_points,
-        x='Time Period',
-        y='Value',
-        title=f"KPI: {kpi_name}",
-        markers=True,
-        labels={"Value": kpi_name}
-    )
+# Upper bound on points sent to the browser per chart; longer series are downsampled
+MAX_PLOT_POINTS = 1000
+
+def lttb_indices(values, n_out):
+    """
+    Pick the indices of `n_out` points that preserve the visual shape of `values`
+    using Largest-Triangle-Three-Buckets downsampling.
+    """
+    y = np.asarray(values, dtype=np.float64)
+    n = len(y)
+    x = np.arange(n, dtype=np.float64)
+
+    # First and last points are always kept; the rest are split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        # Keep the point forming the largest triangle with the previous pick and the next bucket's mean
+        area = np.abs(
+            (x[prev] - avg_x) * (y[lo:hi] - y[prev])
+            - (x[prev] - x[lo:hi]) * (avg_y - y[prev])
+        )
+        prev = lo + int(np.argmax(area))
+        kept[i + 1] = prev
 
-    # Update layout for better aesthetics
+    return kept
+
+def build_kpi_chart(kpi_name):
+    """
+    Build the interactive trend chart for a specific KPI using Plotly.
+    The figure starts with one empty trace; update_kpi_chart fills in the data.
+    """
+    # Imported lazily so sessions that never reach a chart skip Plotly's import cost
+    import plotly.graph_objects as go
+
+    # Scattergl draws through WebGL, which stays responsive on long uploaded series
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        mode='lines+markers',
+        name=kpi_name,
+        uid=kpi_name,
+        hovertemplate="<b>%{x}</b><br>%{y}"
+    ))
+
+    # Update layout for better aesthetics, spacing and readability
     fig.update_layout(
+        title=f"KPI: {kpi_name}",
         xaxis_title="Time Period",
+        xaxis_type="category",
         yaxis_title=kpi_name,
         hovermode="x unified",
         template="plotly_dark",
@@ -108,16 +248,7 @@ def plot_kpi_chart(kpi_name, data_points):
             bgcolor='rgba(0,0,0,0)',
             bordercolor='rgba(0,0,0,0)'
         ),
-        margin=dict(l=40, r=40, t=60, b=40)
-    )
-
-    # Update hover template for clarity
-    fig.update_traces(
-        hovertemplate="<b>%{x}</b><br>%{y}"
-    )
-
-    # Customize the layout for better spacing and readability
-    fig.update_layout(
+        margin=dict(l=40, r=40, t=60, b=40),
         autosize=True,
         width=800,
         height=600
@@ -125,6 +256,46 @@ def plot_kpi_chart(kpi_name, data_points):
 
     return fig
 
+def update_kpi_chart(fig, periods, values, months):
+    """Write a KPI's data points into its chart's trace in place, sorted by month and downsampled."""
+    # Traces take NumPy arrays so Plotly can bulk-encode them instead of boxing each element
+    periods = np.asarray(periods, dtype=object)
+    values = np.asarray(values, dtype=np.float64)
+
+    # Sort by month number, skipping the sort when the data is already in order
+    if (np.diff(months) < 0).any():
+        order = np.argsort(months, kind='stable')
+        periods, values = periods[order], values[order]
+
+    # Downsample long uploads so Plotly doesn't render every point
+    if len(values) > MAX_PLOT_POINTS:
+        kept = lttb_indices(values, MAX_PLOT_POINTS)
+        periods, values = periods[kept], values[kept]
+
+    # The trace keeps row order, so the category axis follows the sort above
+    fig.data[0].update(x=periods, y=values)
+    return fig
+
+# -------------------- Local Data Synthesis --------------------
+
+def synth_fake_data(industry, kpi_name, n=12):
+    """
+    Synthesize n months of KPI values as base + growth * t plus Gaussian noise, using BENCHMARKS.
+    Falls back to the "General" benchmarks for unknown industries;
+    returns None when the KPI has no benchmark entry.
+    """
+    params = BENCHMARKS.get(industry, BENCHMARKS["General"]).get(kpi_name)
+    if params is None:
+        return None
+    # Seed on the inputs (crc32 rather than hash(), which is salted per process) so results are repeatable
+    rng = np.random.default_rng(zlib.crc32(f"{industry}|{kpi_name}".encode()))
+    months = np.arange(n)
+    values = params["base"] + params["growth"] * months + rng.normal(0, params["std_dev"], n)
+    return pd.DataFrame({
+        "Time Period": pd.array([f"Month {i}" for i in range(1, n + 1)], dtype="string"),
+        "Value": values,
+    })
+
 # -------------------- OpenAI Data Generation --------------------
 
 def get_OPENAI_API_KEY():
@@ -137,43 +308,18 @@ def get_OPENAI_API_KEY():
         st.error("OpenAI API key not found. Please set `OPENAI_API_KEY` in Streamlit's secrets.")
         st.stop()
 
-def generate_focused_fake_data(industry, product_audience, kpi_name, kpi_description):
+@st.cache_resource(show_spinner=False)
+def get_openai_client():
     """
-    Generate fake data based on Industry, Product Audience, and KPI using OpenAI.
-    Returns a pandas DataFrame with 'Time Period' and 'Value'.
+    Creates the OpenAI client once per process, so its pooled HTTPS connections survive reruns.
     """
-    # Initialize OpenAI API key
-    OPENAI_API_KEY = get_OPENAI_API_KEY()
-    openai.api_key = OPENAI_API_KEY
-    
-    # Create a refined prompt for OpenAI to generate data
-    prompt = (
-        f"Generate a realistic set of monthly KPI values for the next 12 months based on the following details:\n\n"
-        f"Industry: {industry}\n"
-        f"Product Audience: {product_audience}\n"
-        f"KPI Name: {kpi_name}\n"
-        f"KPI Description: {kpi_description}\n\n"
-        f"Provide ONLY the data in a JSON format with 'Time Period' and 'Value' keys, enclosed within a JSON code block.\n\n"
-        f"```json\n"
-        f"[\n"
-        f"    {{\"Time Period\": \"Month 1\", \"Value\": 100}},\n"
-        f"    {{\"Time Period\": \"Month 2\", \"Value\": 105}},\n"
-        f"    {{\"Time Period\": \"Month 3\", \"Value\": 110}},\n"
-        f"    {{\"Time Period\": \"Month 4\", \"Value\": 115}},\n"
-        f"    {{\"Time Period\": \"Month 5\", \"Value\": 120}},\n"
-        f"    {{\"Time Period\": \"Month 6\", \"Value\": 125}},\n"
-        f"    {{\"Time Period\": \"Month 7\", \"Value\": 130}},\n"
-        f"    {{\"Time Period\": \"Month 8\", \"Value\": 135}},\n"
-        f"    {{\"Time Period\": \"Month 9\", \"Value\": 140}},\n"
-        f"    {{\"Time Period\": \"Month 10\", \"Value\": 145}},\n"
-        f"    {{\"Time Period\": \"Month 11\", \"Value\": 150}},\n"
-        f"    {{\"Time Period\": \"Month 12\", \"Value\": 155}}\n"
-        f"]\n"
-        f"```"
-    )
-    
-    # Define the JSON schema for validation
-    kpi_schema = {
+    from openai import OpenAI
+    return OpenAI(api_key=get_OPENAI_API_KEY())
+
+# Define the JSON schema for validation: KPI name -> list of monthly data points
+KPI_DATA_SCHEMA = {
+    "type": "object",
+    "additionalProperties": {
         "type": "array",
         "items": {
             "type": "object",
@@ -184,138 +330,286 @@ def generate_focused_fake_data(industry, product_audience, kpi_name, kpi_descrip
             "required": ["Time Period", "Value"]
         }
     }
-    
+}
+
+# Extracts the body of a ```json fenced block; compiled once at import
+JSON_CODE_BLOCK_RE = re.compile(r"```json\s*([\s\S]*?)\s*```")
+
+# Completion budget for one KPI's 12 data points, leaving headroom over the roughly 200 tokens
+# the rows and KPI key need; batched requests scale it by the KPI count
+KPI_MAX_TOKENS = 300
+
+# Generated data is reused for a day, keeping at most this many requests
+KPI_CACHE_TTL = 86400
+KPI_CACHE_MAX_ENTRIES = 256
+# The cache is mirrored to this file so paid-for replies survive app restarts
+KPI_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".kpi_data_cache.json")
+
+class KPIDataError(Exception):
+    """
+    Raised when an OpenAI response can't be turned into KPI data.
+    Carries the offending output so it can be shown for debugging.
+    """
+    def __init__(self, message, label, details):
+        super().__init__(message)
+        self.message = message
+        self.label = label
+        self.details = details
+
+@st.cache_resource(show_spinner=False)
+def get_kpi_data_cache():
+    """
+    Process-wide cache of generated KPI data, keyed on the request inputs, and the lock guarding it.
+    Kept by hand rather than with st.cache_data so the streamed response can be rendered live;
+    the dict is shared by every session, so it is only read or changed while holding the lock.
+    Starts from the unexpired entries saved in KPI_CACHE_PATH, if any.
+    """
+    now = time.time()
     try:
-        # Call OpenAI API
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that generates realistic KPI data."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=300
+        with open(KPI_CACHE_PATH, "rb") as f:
+            saved = orjson.loads(f.read())
+        cache = {
+            key: [saved_at, data] for key, (saved_at, data) in saved.items()
+            if now - saved_at < KPI_CACHE_TTL
+        }
+    except (OSError, ValueError, TypeError, AttributeError):
+        # Missing, unreadable or malformed file: start empty
+        cache = {}
+    return cache, threading.Lock()
+
+def save_kpi_data_cache(cache):
+    """
+    Writes the KPI data cache to KPI_CACHE_PATH; call while holding the cache lock.
+    The file is replaced atomically, and a failed write only costs persistence.
+    """
+    tmp_path = f"{KPI_CACHE_PATH}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(cache))
+        os.replace(tmp_path, KPI_CACHE_PATH)
+    except OSError:
+        pass
+
+def fetch_kpi_data_points(industry, product_audience, kpis, placeholder=None):
+    """
+    Asks OpenAI for 12 months of values for every (name, description) pair in `kpis` in one request,
+    streaming the response into `placeholder` as it arrives.
+    Returns the validated JSON object keyed by KPI name.
+    Results are cached on the inputs for a day; failures raise and are never cached.
+    """
+    cache, cache_lock = get_kpi_data_cache()
+    # A JSON string key, so entries round-trip through the on-disk copy unchanged
+    cache_key = orjson.dumps([industry, product_audience, kpis]).decode('utf-8')
+    with cache_lock:
+        cached = cache.get(cache_key)
+    if cached is not None and time.time() - cached[0] < KPI_CACHE_TTL:
+        return cached[1]
+
+    # jsonschema is only needed to validate OpenAI replies, so it's imported on the first uncached request
+    import jsonschema
+    from jsonschema import validate
+
+    client = get_openai_client()
+
+    kpi_lines = "".join(f"- {kpi_name}: {kpi_description}\n" for kpi_name, kpi_description in kpis)
+
+    # Static instructions come first and the KPI details last, so repeated requests share a prompt prefix
+    prompt = (
+        f"Generate a realistic set of monthly KPI values for the next 12 months for each KPI listed at the end of this message.\n\n"
+        f"Provide ONLY the data as a JSON object keyed by KPI name, where each value is a list of objects "
+        f"with 'Time Period' and 'Value' keys, for example:\n\n"
+        f"```json\n"
+        f"{{\n"
+        f"    \"KPI Name\": [\n"
+        f"        {{\"Time Period\": \"Month 1\", \"Value\": 100}},\n"
+        f"        {{\"Time Period\": \"Month 2\", \"Value\": 105}},\n"
+        f"        {{\"Time Period\": \"Month 3\", \"Value\": 110}},\n"
+        f"        {{\"Time Period\": \"Month 4\", \"Value\": 115}},\n"
+        f"        {{\"Time Period\": \"Month 5\", \"Value\": 120}},\n"
+        f"        {{\"Time Period\": \"Month 6\", \"Value\": 125}},\n"
+        f"        {{\"Time Period\": \"Month 7\", \"Value\": 130}},\n"
+        f"        {{\"Time Period\": \"Month 8\", \"Value\": 135}},\n"
+        f"        {{\"Time Period\": \"Month 9\", \"Value\": 140}},\n"
+        f"        {{\"Time Period\": \"Month 10\", \"Value\": 145}},\n"
+        f"        {{\"Time Period\": \"Month 11\", \"Value\": 150}},\n"
+        f"        {{\"Time Period\": \"Month 12\", \"Value\": 155}}\n"
+        f"    ]\n"
+        f"}}\n"
+        f"```\n\n"
+        f"Industry: {industry}\n"
+        f"Product Audience: {product_audience}\n"
+        f"KPIs (name: description):\n"
+        f"{kpi_lines}"
+    )
+
+    max_tokens = KPI_MAX_TOKENS * len(kpis)
+
+    # Call OpenAI API; JSON mode keeps the reply parseable and streaming shows progress immediately
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant that generates realistic KPI data."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=max_tokens,
+        response_format={"type": "json_object"},
+        stream=True
+    )
+
+    # Accumulate the streamed JSON, echoing it as it arrives
+    generated_text = ""
+    finish_reason = None
+    for chunk in response:
+        if chunk.choices:
+            if chunk.choices[0].delta.content:
+                generated_text += chunk.choices[0].delta.content
+            # Only the final chunk carries a finish reason
+            finish_reason = chunk.choices[0].finish_reason or finish_reason
+        if placeholder is not None:
+            placeholder.text(generated_text)
+    if placeholder is not None:
+        placeholder.empty()
+
+    if finish_reason == "length":
+        raise KPIDataError(
+            f"OpenAI response was cut off at the {max_tokens}-token limit before the data was complete.",
+            "Generated Text",
+            generated_text
         )
-        
-        # Extract the generated JSON
-        generated_text = response.choices[0].message['content']
-        
-        # Attempt to extract JSON data from the response
-        json_match = re.search(r"```json\s*([\s\S]*?)\s*```", generated_text)
-        if json_match:
-            json_str = json_match.group(1)
-            try:
-                generated_data = json.loads(json_str)
-            except json.JSONDecodeError as e:
-                st.error(f"Failed to parse JSON data from OpenAI response: {e}")
-                st.text("**Generated Text:**")
-                st.text(generated_text)  # For debugging purposes
-                return pd.DataFrame()
-        else:
-            st.error("No JSON code block found in OpenAI response.")
-            st.text("**Generated Text:**")
-            st.text(generated_text)  # For debugging purposes
-            return pd.DataFrame()
-        
-        # Validate the JSON data against the schema
+
+    try:
+        generated_data = orjson.loads(generated_text)
+    except orjson.JSONDecodeError:
+        # Fall back to a JSON code block in case the reply wasn't bare JSON
+        json_match = JSON_CODE_BLOCK_RE.search(generated_text)
+        if not json_match:
+            raise KPIDataError("No JSON data found in OpenAI response.", "Generated Text", generated_text)
         try:
-            validate(instance=generated_data, schema=kpi_schema)
-        except jsonschema.exceptions.ValidationError as ve:
-            st.error(f"JSON data does not match the expected schema: {ve.message}")
-            st.text("**Generated Data:**")
-            st.text(json.dumps(generated_data, indent=4))  # Display the incorrect data for debugging
-            return pd.DataFrame()
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(generated_data)
-        
-        return df
-    
-    except openai.error.RateLimitError:
+            generated_data = orjson.loads(json_match.group(1))
+        except orjson.JSONDecodeError as e:
+            raise KPIDataError(f"Failed to parse JSON data from OpenAI response: {e}", "Generated Text", generated_text)
+
+    # Validate the JSON data against the schema
+    try:
+        validate(instance=generated_data, schema=KPI_DATA_SCHEMA)
+    except jsonschema.exceptions.ValidationError as ve:
+        raise KPIDataError(
+            f"JSON data does not match the expected schema: {ve.message}",
+            "Generated Data",
+            orjson.dumps(generated_data, option=orjson.OPT_INDENT_2).decode('utf-8')
+        )
+
+    # Store the result, evicting the oldest entry once full; dicts keep insertion order
+    with cache_lock:
+        if len(cache) >= KPI_CACHE_MAX_ENTRIES:
+            cache.pop(next(iter(cache)), None)
+        cache[cache_key] = [time.time(), generated_data]
+        save_kpi_data_cache(cache)
+    return generated_data
+
+def generate_focused_fake_data_batch(industry, product_audience, kpis):
+    """
+    Generate fake data for several KPIs at once based on Industry and Product Audience using OpenAI.
+    Returns a dict mapping KPI name to a pandas DataFrame with 'Time Period' and 'Value';
+    an empty dict if the request failed.
+    """
+    # Imported lazily so the survey page doesn't pay for the OpenAI client import
+    import openai
+
+    try:
+        generated_data = fetch_kpi_data_points(
+            industry,
+            product_audience,
+            tuple((kpi['name'], kpi['description']) for kpi in kpis),
+            placeholder=st.empty()
+        )
+    except KPIDataError as e:
+        st.error(e.message)
+        st.text(f"**{e.label}:**")
+        st.text(e.details)  # For debugging purposes
+        return {}
+    except openai.RateLimitError:
         st.error("OpenAI API rate limit exceeded. Please try again later.")
-        return pd.DataFrame()
-    except openai.error.OpenAIError as e:
+        return {}
+    except openai.OpenAIError as e:
         st.error(f"OpenAI API error: {e}")
-        return pd.DataFrame()
+        return {}
     except Exception as e:
         st.error(f"An unexpected error occurred: {e}")
-        return pd.DataFrame()
-
-# -------------------- KPI Explanation Function --------------------
+        return {}
 
-def explain_kpis(kpi_list):
-    """
-    Generates explanations for each KPI.
-    """
-    explanations = {}
-    for kpi in kpi_list:
-        explanations[kpi['name']] = f"{kpi['description']} ({kpi['guidance']})"
-    return explanations
+    # Convert to DataFrames with an explicit schema instead of per-column dtype inference
+    return {
+        kpi_name: pd.DataFrame.from_records(rows, columns=["Time Period", "Value"]).astype(
+            {"Time Period": "string", "Value": "float64"}
+        )
+        for kpi_name, rows in generated_data.items()
+    }
 
 # -------------------- Pre-Defined KPIs per Phase --------------------
 
+# Pre-defined KPI templates, built once at import
+PREDEFINED_KPIS = {
+    "POC": [
+        {
+            "name": "User Engagement",
+            "description": "Measures the level of user interaction with the product during the POC phase.",
+            "guidance": "Aim for ≥ 60% engagement rate."
+        },
+        {
+            "name": "Homepage Clicks",
+            "description": "Tracks the number of clicks on homepage listings within the platform.",
+            "guidance": "Aim for ≥ 1000 clicks per month."
+        },
+        {
+            "name": "Accounts Activated",
+            "description": "Number of new user accounts activated during the POC phase.",
+            "guidance": "Aim for ≥ 500 activations."
+        }
+    ],
+    "Closed Beta": [
+        {
+            "name": "User Engagement",
+            "description": "Measures the continued interaction of users with the product during the Closed Beta phase.",
+            "guidance": "Aim for ≥ 70% engagement rate."
+        },
+        {
+            "name": "Subscriptions Renewed",
+            "description": "Tracks the number of user subscriptions that are renewed during the beta period.",
+            "guidance": "Aim for ≥ 400 renewals."
+        },
+        {
+            "name": "Homepage Clicks",
+            "description": "Monitors the engagement with homepage links within the platform.",
+            "guidance": "Aim for ≥ 1200 clicks per month."
+        }
+    ],
+    "Public MVP": [
+        {
+            "name": "User Engagement",
+            "description": "Assessing user interaction and activity levels post-launch of the MVP.",
+            "guidance": "Aim for ≥ 80% engagement rate."
+        },
+        {
+            "name": "Subscriptions Renewed",
+            "description": "Measures the retention of user subscriptions over time.",
+            "guidance": "Aim for ≥ 500 renewals."
+        },
+        {
+            "name": "Accounts Activated",
+            "description": "Number of new user accounts activated after MVP launch.",
+            "guidance": "Aim for ≥ 600 activations."
+        }
+    ]
+}
+
 def get_predefined_kpis(phase, survey_responses):
     """
     Returns a list of practical KPIs based on the phase and survey responses.
     """
-    industry = survey_responses.get("Industry", "General")
-    product_audience = survey_responses.get("Product Audience", "General")
-    
-    predefined_kpis = {
-        "POC": [
-            {
-                "name": "User Engagement",
-                "description": "Measures the level of user interaction with the product during the POC phase.",
-                "guidance": "Aim for ≥ 60% engagement rate."
-            },
-            {
-                "name": "Homepage Clicks",
-                "description": "Tracks the number of clicks on homepage listings within the platform.",
-                "guidance": "Aim for ≥ 1000 clicks per month."
-            },
-            {
-                "name": "Accounts Activated",
-                "description": "Number of new user accounts activated during the POC phase.",
-                "guidance": "Aim for ≥ 500 activations."
-            }
-        ],
-        "Closed Beta": [
-            {
-                "name": "User Engagement",
-                "description": "Measures the continued interaction of users with the product during the Closed Beta phase.",
-                "guidance": "Aim for ≥ 70% engagement rate."
-            },
-            {
-                "name": "Subscriptions Renewed",
-                "description": "Tracks the number of user subscriptions that are renewed during the beta period.",
-                "guidance": "Aim for ≥ 400 renewals."
-            },
-            {
-                "name": "Homepage Clicks",
-                "description": "Monitors the engagement with homepage links within the platform.",
-                "guidance": "Aim for ≥ 1200 clicks per month."
-            }
-        ],
-        "Public MVP": [
-            {
-                "name": "User Engagement",
-                "description": "Assessing user interaction and activity levels post-launch of the MVP.",
-                "guidance": "Aim for ≥ 80% engagement rate."
-            },
-            {
-                "name": "Subscriptions Renewed",
-                "description": "Measures the retention of user subscriptions over time.",
-                "guidance": "Aim for ≥ 500 renewals."
-            },
-            {
-                "name": "Accounts Activated",
-                "description": "Number of new user accounts activated after MVP launch.",
-                "guidance": "Aim for ≥ 600 activations."
-            }
-        ]
-    }
-    
-    return predefined_kpis.get(phase, [])
+    # Shallow copy so callers can extend the list without touching the templates
+    return list(PREDEFINED_KPIS.get(phase, ()))
 
 # -------------------- Survey Page --------------------
 
@@ -479,11 +773,15 @@ def survey_page():
             st.session_state.survey_completed = True
             st.success("Survey submitted successfully! Generating phase outputs...")
 
+            # Look up each phase's KPIs once; they feed both the phase outputs and the suggestions
+            kpi_suggestions = {
+                phase: get_predefined_kpis(phase, st.session_state.survey_responses)
+                for phase in PREDEFINED_KPIS
+            }
+
             # Generate phase outputs based on pre-defined templates
             phase_outputs = {}
-            phases = ["POC", "Closed Beta", "Public MVP"]
-            for phase in phases:
-                kpis = get_predefined_kpis(phase, st.session_state.survey_responses)
+            for phase, kpis in kpi_suggestions.items():
                 phase_outputs[phase] = {
                     "Primary Objective": f"Define the primary objective for the {phase} phase based on your survey inputs.",
                     "Top 3 KPIs": [kpi['name'] for kpi in kpis[:3]],
@@ -498,17 +796,90 @@ def survey_page():
 
             st.session_state.phase_outputs = phase_outputs
             # Store actual KPIs separately
-            st.session_state.kpi_suggestions = {
-                phase: get_predefined_kpis(phase, st.session_state.survey_responses)
-                for phase in phases
-            }
-            # Generate explanations for all KPIs
-            all_kpis = []
-            for kpi_list in st.session_state.kpi_suggestions.values():
-                all_kpis.extend(kpi_list)
-            st.session_state.kpi_explanations = explain_kpis(all_kpis)
+            st.session_state.kpi_suggestions = kpi_suggestions
             st.success("Phase outputs generated successfully! You can now access the KPI tools.")
 
+# -------------------- KPI Tracker --------------------
+
+# Accepted format for manually entered time periods, e.g. 'Month 13'
+TIME_PERIOD_RE = re.compile(r'^Month\s+\d+$', re.ASCII)
+
+@st.fragment
+def render_kpi_tracker(idx, kpi):
+    """
+    Renders the data management, table and chart for one tracked KPI.
+    Runs as a fragment, so interacting with one KPI only reruns that KPI's block.
+    """
+    name = kpi['name']
+    st.markdown(f"### {idx}. {name}")
+    st.write(f"**Description:** {kpi['description']}")
+    st.write(f"**Guidance:** {kpi['guidance']}")
+
+    # Data Management Options
+    data_option = st.radio(
+        f"How would you like to manage data for '{name}'?",
+        ["Upload Data", "Generate Imaginary Data", "Manually Add Data"],
+        key=f"data_option_{name}"
+    )
+
+    # Upload Data
+    if data_option == "Upload Data":
+        uploaded_file = st.file_uploader(
+            f"Upload data for '{name}'",
+            type=["csv", "xlsx"],
+            key=f"upload_{name}"
+        )
+        if uploaded_file:
+            try:
+                df = read_uploaded_kpi_data(uploaded_file)
+                # Validate required columns
+                if UPLOAD_COLUMNS.issubset(df.columns):
+                    df = df.rename(columns={'time_period': 'Time Period', 'value': 'Value'})
+                    # Check if 'Value' is numeric
+                    if pd.api.types.is_numeric_dtype(df['Value']):
+                        set_kpi_data(name, df)
+                        st.success(f"Data uploaded successfully for '{name}'")
+                        st.dataframe(get_kpi_table(name))
+                    else:
+                        st.error("'Value' column must contain numeric data.")
+                else:
+                    st.error("Uploaded file must contain 'time_period' and 'value' columns.")
+            except Exception as e:
+                st.error(f"Error reading uploaded file: {e}")
+
+    # Generate Imaginary Data
+    elif data_option == "Generate Imaginary Data":
+        # Generation is batched across KPIs by the button above the tracker
+        st.info("Use 'Generate Imaginary Data for Selected KPIs' above the tracker to generate data for this KPI.")
+
+    # Manually Add Data
+    elif data_option == "Manually Add Data":
+        with st.expander(f"Add Data for {name}"):
+            # A form batches edits so typing doesn't rerun the script on every keystroke
+            with st.form(f"form_{name}", clear_on_submit=True):
+                time_period = st.text_input(f"Time Period for {name} (e.g., Month 13)", key=f"time_{name}")
+                value = st.number_input(f"Value for {name}", key=f"value_{name}")
+                submitted = st.form_submit_button(f"Add Data Point for '{name}'")
+            if submitted:
+                if time_period and value is not None:
+                    # Validate 'Time Period' format
+                    if not TIME_PERIOD_RE.match(time_period):
+                        st.error("Time Period must be in the format 'Month X', where X is a number (e.g., 'Month 13').")
+                    else:
+                        append_kpi_data_point(name, time_period, value)
+                        st.success(f"Data point added for '{name}'")
+                else:
+                    st.error("Please provide both Time Period and Value.")
+
+    # Display Data and Plot
+    if name in st.session_state.kpi_data:
+        st.write(f"### Data for '{name}'")
+        st.dataframe(get_kpi_table(name))
+        # Plotting with Plotly
+        fig = get_kpi_chart(name)
+        # A stable key and trace uid let the frontend diff the chart instead of rebuilding it
+        st.plotly_chart(fig, use_container_width=True, key=f"chart_{name}")
+
 # -------------------- Main App Logic --------------------
 
 def main():
@@ -549,22 +920,17 @@ def main():
         # Display Suggested KPIs and Explanations
         if st.session_state.kpi_suggestions:
             st.subheader("Suggested KPIs")
-            # Allow users to select KPIs
-            kpi_options = [f"{kpi['name']}: {kpi['description']}" for kpi in st.session_state.kpi_suggestions.get(phase, [])]
+            # Allow users to select KPIs; options are KPI names, labelled with their descriptions
+            kpis_by_name = {kpi['name']: kpi for kpi in st.session_state.kpi_suggestions.get(phase, [])}
             selected = st.multiselect(
                 "Select KPIs you want to track:",
-                options=kpi_options,
+                options=list(kpis_by_name),
+                format_func=lambda name: f"{name}: {kpis_by_name[name]['description']}",
                 key=f"kpi_multiselect_{phase}"
             )
 
-            # Map selected options back to KPI structures
-            selected_struct = []
-            for sel in selected:
-                kpi_name = sel.split(":")[0]
-                for kpi in st.session_state.kpi_suggestions.get(phase, []):
-                    if kpi['name'] == kpi_name:
-                        selected_struct.append(kpi)
-                        break
+            # Map selected names back to KPI structures
+            selected_struct = [kpis_by_name[name] for name in selected]
 
             # Update session state with selected KPIs
             st.session_state.selected_kpis_struct = selected_struct
@@ -585,101 +951,54 @@ def main():
         if not st.session_state.selected_kpis_struct:
             st.info("No KPIs selected yet. Go to the 'Suggested KPIs' section above to select KPIs to track.")
         else:
-            for idx, kpi in enumerate(st.session_state.selected_kpis_struct, 1):
-                st.markdown(f"### {idx}. {kpi['name']}")
-                st.write(f"**Description:** {kpi['description']}")
-                st.write(f"**Guidance:** {kpi['guidance']}")
-
-                # Data Management Options
-                data_option = st.radio(
-                    f"How would you like to manage data for '{kpi['name']}'?",
-                    ["Upload Data", "Generate Imaginary Data", "Manually Add Data"],
-                    key=f"data_option_{kpi['name']}"
-                )
-
-                # Upload Data
-                if data_option == "Upload Data":
-                    uploaded_file = st.file_uploader(
-                        f"Upload data for '{kpi['name']}'",
-                        type=["csv", "xlsx"],
-                        key=f"upload_{kpi['name']}"
-                    )
-                    if uploaded_file:
-                        try:
-                            if uploaded_file.name.endswith(".csv"):
-                                df = pd.read_csv(uploaded_file)
-                            else:
-                                df = pd.read_excel(uploaded_file)
-                            # Validate required columns
-                            if set(['time_period', 'value']).issubset([col.lower() for col in df.columns]):
-                                df.columns = [col.lower() for col in df.columns]
-                                df = df.rename(columns={'time_period': 'Time Period', 'value': 'Value'})
-                                # Check if 'Value' is numeric
-                                if pd.api.types.is_numeric_dtype(df['Value']):
-                                    st.session_state.kpi_data[kpi['name']] = df
-                                    st.success(f"Data uploaded successfully for '{kpi['name']}'")
-                                    st.dataframe(df)
-                                else:
-                                    st.error("'Value' column must contain numeric data.")
-                            else:
-                                st.error("Uploaded file must contain 'time_period' and 'value' columns.")
-                        except Exception as e:
-                            st.error(f"Error reading uploaded file: {e}")
-
-                # Generate Imaginary Data with OpenAI
-                elif data_option == "Generate Imaginary Data":
+            # Imaginary data is synthesized locally from BENCHMARKS; OpenAI is only an opt-in fallback
+            use_openai = st.toggle(
+                "Advanced: use OpenAI for KPIs without benchmark data",
+                key="use_openai_generation"
+            )
+            if st.button("Generate Imaginary Data for Selected KPIs", key="generate_selected"):
+                to_generate = [
+                    kpi for kpi in st.session_state.selected_kpis_struct
+                    if st.session_state.get(f"data_option_{kpi['name']}") == "Generate Imaginary Data"
+                ]
+                if not to_generate:
+                    st.info("Set a KPI's data option to 'Generate Imaginary Data' to include it.")
+                else:
                     # Retrieve survey responses
                     survey = st.session_state.survey_responses
                     industry = survey.get("Industry", "General")
                     product_audience = survey.get("Product Audience", "General")
 
-                    if st.button(f"Generate Data for '{kpi['name']}'", key=f"generate_{kpi['name']}"):
+                    unbenchmarked = []
+                    for kpi in to_generate:
+                        df = synth_fake_data(industry, kpi['name'])
+                        if df is None:
+                            unbenchmarked.append(kpi)
+                        else:
+                            set_kpi_data(kpi['name'], df)
+                            st.success(f"Imaginary data generated successfully for '{kpi['name']}'")
+
+                    if unbenchmarked and not use_openai:
+                        names = ", ".join(f"'{kpi['name']}'" for kpi in unbenchmarked)
+                        st.warning(f"No benchmark data for {names}. Enable the Advanced toggle to generate it with OpenAI.")
+                    elif unbenchmarked:
+                        # One OpenAI request covers every KPI without a benchmark
                         with st.spinner("Generating data with OpenAI..."):
-                            df = generate_focused_fake_data(
+                            generated = generate_focused_fake_data_batch(
                                 industry=industry,
                                 product_audience=product_audience,
-                                kpi_name=kpi['name'],
-                                kpi_description=kpi['description']
+                                kpis=unbenchmarked
                             )
-                        if not df.empty:
-                            st.session_state.kpi_data[kpi['name']] = df
-                            st.success(f"Imaginary data generated successfully for '{kpi['name']}'")
-                            st.dataframe(df)
-
-                # Manually Add Data
-                elif data_option == "Manually Add Data":
-                    with st.expander(f"Add Data for {kpi['name']}"):
-                        time_period = st.text_input(f"Time Period for {kpi['name']} (e.g., Month 13)", key=f"time_{kpi['name']}")
-                        value = st.number_input(f"Value for {kpi['name']}", key=f"value_{kpi['name']}")
-                        if st.button(f"Add Data Point for '{kpi['name']}'", key=f"add_{kpi['name']}"):
-                            if time_period and value is not None:
-                                # Validate 'Time Period' format
-                                if not re.match(r'^Month\s+\d+$', time_period):
-                                    st.error("Time Period must be in the format 'Month X', where X is a number (e.g., 'Month 13').")
-                                else:
-                                    new_data = pd.DataFrame({"Time Period": [time_period], "Value": [value]})
-                                    if kpi['name'] in st.session_state.kpi_data:
-                                        st.session_state.kpi_data[kpi['name']] = pd.concat(
-                                            [st.session_state.kpi_data[kpi['name']], new_data],
-                                            ignore_index=True
-                                        )
-                                    else:
-                                        st.session_state.kpi_data[kpi['name']] = new_data
-                                    st.success(f"Data point added for '{kpi['name']}'")
-                            else:
-                                st.error("Please provide both Time Period and Value.")
-
-                # Display Data and Plot
-                if kpi['name'] in st.session_state.kpi_data:
-                    df = st.session_state.kpi_data[kpi['name']]
-                    # Remove 'Month_Number' if exists from previous plots
-                    if 'Month_Number' in df.columns:
-                        df = df.drop(columns=['Month_Number'])
-                    st.write(f"### Data for '{kpi['name']}'")
-                    st.dataframe(df)
-                    # Plotting with Plotly
-                    fig = plot_kpi_chart(kpi['name'], df)
-                    st.plotly_chart(fig, use_container_width=True)
+                        for kpi in unbenchmarked:
+                            df = generated.get(kpi['name'])
+                            if df is not None and not df.empty:
+                                set_kpi_data(kpi['name'], df)
+                                st.success(f"Imaginary data generated successfully for '{kpi['name']}'")
+                            elif generated:
+                                st.warning(f"No data was generated for '{kpi['name']}'.")
+
+            for idx, kpi in enumerate(st.session_state.selected_kpis_struct, 1):
+                render_kpi_tracker(idx, kpi)
 
         st.markdown("---")
 
@@ -689,15 +1008,11 @@ def main():
         if not st.session_state.get("selected_kpis_struct"):
             st.info("No KPIs selected yet. Go to the 'Suggested KPIs' section above to select KPIs to track.")
         else:
-            # Generate explanations if not already done
-            if not st.session_state.get("kpi_explanations"):
-                explanations = explain_kpis(st.session_state.selected_kpis_struct)
-                st.session_state.kpi_explanations = explanations
-
-            # Display explanations
-            for kpi_name, explanation in st.session_state.kpi_explanations.items():
-                st.markdown(f"### {kpi_name}")
-                st.write(explanation)
+            # Display explanations built from each selected KPI's own phase-specific template,
+            # since the same KPI name carries different guidance in different phases
+            for kpi in st.session_state.selected_kpis_struct:
+                st.markdown(f"### {kpi['name']}")
+                st.write(f"{kpi['description']} ({kpi['guidance']})")
 
         st.markdown("---")
 
@@ -708,32 +1023,40 @@ def main():
         else:
             st.subheader("Download KPIs")
             kpi_list = st.session_state.selected_kpis_struct
-            # Export options
-            csv = export_kpis_csv(kpi_list)
-            json_data = export_kpis_json(kpi_list)
-            text = export_kpis_text(kpi_list)
-
-            if csv:
-                st.download_button(
-                    label="Download KPIs as CSV",
-                    data=csv,
-                    file_name="kpis.csv",
-                    mime="text/csv"
-                )
-            if json_data:
-                st.download_button(
-                    label="Download KPIs as JSON",
-                    data=json_data,
-                    file_name="kpis.json",
-                    mime="application/json"
-                )
-            if text:
-                st.download_button(
-                    label="Download KPIs as Text",
-                    data=text,
-                    file_name="kpis.txt",
-                    mime="text/plain"
-                )
+            # Serialize only on request; prepared files are reused until the selection changes
+            if st.button("Prepare Downloads", key="prepare_exports"):
+                st.session_state.export_payloads = {
+                    "kpis": kpi_list,
+                    "csv": export_kpis_csv(kpi_list),
+                    "json": export_kpis_json(kpi_list),
+                    "text": export_kpis_text(kpi_list),
+                }
+
+            payloads = st.session_state.export_payloads
+            if payloads.get("kpis") != kpi_list:
+                st.info("Click 'Prepare Downloads' to generate export files for the selected KPIs.")
+            else:
+                if payloads["csv"]:
+                    st.download_button(
+                        label="Download KPIs as CSV",
+                        data=payloads["csv"],
+                        file_name="kpis.csv",
+                        mime="text/csv"
+                    )
+                if payloads["json"]:
+                    st.download_button(
+                        label="Download KPIs as JSON",
+                        data=payloads["json"],
+                        file_name="kpis.json",
+                        mime="application/json"
+                    )
+                if payloads["text"]:
+                    st.download_button(
+                        label="Download KPIs as Text",
+                        data=payloads["text"],
+                        file_name="kpis.txt",
+                        mime="text/plain"
+                    )
 
 # -------------------- Run the App --------------------
 
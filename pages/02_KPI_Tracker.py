@@ -1,33 +1,132 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
 import io
+import re
+import threading
+
+# Splits the data-points input on commas and any whitespace around them
+DATA_POINT_SPLIT_RE = re.compile(r"\s*,\s*", re.ASCII)
+# One plain decimal number, e.g. 10, -2.5, .5 or 1e3
+NUMBER_PATTERN = r"[+-]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][+-]?[0-9]+)?"
+DATA_POINT_RE = re.compile(NUMBER_PATTERN, re.ASCII)
+# A whole comma-separated list of numbers; checked in one scan so NumPy only ever sees valid input
+DATA_POINTS_RE = re.compile(rf"\s*{NUMBER_PATTERN}(?:\s*,\s*{NUMBER_PATTERN})*\s*", re.ASCII)
+
+def downcast_numeric_columns(table):
+    # Narrow int64/float64 columns to the smallest type that holds every value exactly,
+    # so less data is cached and shipped to the browser
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    columns = []
+    for column in table.columns:
+        if pa.types.is_int64(column.type) and column.null_count < len(column):
+            bounds = pc.min_max(column)
+            low, high = bounds["min"].as_py(), bounds["max"].as_py()
+            for narrow in (pa.int8(), pa.int16(), pa.int32()):
+                info = np.iinfo(narrow.to_pandas_dtype())
+                if info.min <= low and high <= info.max:
+                    column = column.cast(narrow)
+                    break
+        elif pa.types.is_float64(column.type):
+            narrowed = column.cast(pa.float32(), safe=False)
+            if pc.all(pc.equal(narrowed.cast(pa.float64()), column)).as_py() is not False:
+                column = narrowed
+        columns.append(column)
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def parse_kpi_csv(file_bytes):
+    # Keyed on the file's bytes, so reruns reuse the parsed table; parse errors raise and aren't cached
+    try:
+        # pyarrow's multithreaded parser straight into an Arrow table, which st.dataframe
+        # hands to the frontend as-is instead of converting a pandas frame on every rerun
+        import pyarrow.csv as pa_csv
+        return downcast_numeric_columns(pa_csv.read_csv(io.BytesIO(file_bytes)))
+    except (ImportError, ValueError):
+        # pandas is imported here so the page's first render, before any upload, doesn't load it
+        import pandas as pd
+        df = pd.read_csv(io.BytesIO(file_bytes))
+        for column in df.select_dtypes(include="integer").columns:
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+        return df
 
 def load_kpi_data(uploaded_file):
     if uploaded_file is not None:
         # Attempt to read CSV
         try:
-            df = pd.read_csv(uploaded_file)
-            return df
+            return parse_kpi_csv(uploaded_file.getvalue())
         except Exception as e:
             st.error(f"Error reading file: {e}")
     return None
 
+@st.cache_resource(show_spinner=False)
+def get_kpi_axes():
+    # matplotlib is only needed for the PNG export, so import it on first use. The Figure is built
+    # directly on an Agg canvas, bypassing pyplot's global figure registry and backend selection
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    # One Figure/Axes is reused for every export; the lock keeps sessions from drawing on it at once
+    fig = Figure(figsize=(6, 3))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    return fig, ax, threading.Lock()
+
 def plot_kpi_graph(kpi_name, data_points):
-    # Create a simple line chart for the KPI data
-    fig, ax = plt.subplots()
+    # Redraw the shared Axes with the KPI data; callers must hold the lock from get_kpi_axes()
+    fig, ax, _ = get_kpi_axes()
+    ax.cla()
     ax.plot(data_points, marker='o')
     ax.set_title(f"KPI: {kpi_name}")
     ax.set_xlabel("Time Period")
     ax.set_ylabel("Value")
     return fig
 
+@st.cache_data(show_spinner=False, max_entries=16)
+def render_kpi_graph_png(kpi_name, data_points):
+    # Cached on the inputs, so unchanged reruns skip the Agg render and encode entirely
+    _, _, lock = get_kpi_axes()
+    buf = io.BytesIO()
+    with lock:
+        fig = plot_kpi_graph(kpi_name, data_points)
+        # zlib level 3 trades a slightly larger file for a faster encode than the default level 6
+        fig.savefig(buf, format="png", pil_kwargs={"compress_level": 3})
+    return buf.getvalue()
+
+def parse_data_points(data_points_str):
+    # Returns the points as a float64 array, or None if any entry isn't a number
+    # The input is validated by one regex scan first: older NumPy releases silently stop at a
+    # malformed entry (and read blank ones as -1.0) instead of raising
+    if not DATA_POINTS_RE.fullmatch(data_points_str):
+        return None
+    # Parse every point in one C call
+    data_points = np.fromstring(data_points_str, dtype=np.float64, sep=",")
+    if len(data_points) != data_points_str.count(",") + 1:
+        return None
+    return data_points
+
+def invalid_data_points(data_points_str):
+    # Slow path, only used to report which entries failed validation
+    invalid = []
+    for token in DATA_POINT_SPLIT_RE.split(data_points_str.strip()):
+        if not DATA_POINT_RE.fullmatch(token):
+            invalid.append(token or "(empty)")
+    return invalid
+
 st.title("KPI Tracker")
 st.write("Upload your previously configured KPIs and track their progress over time.")
 
 uploaded_file = st.file_uploader("Upload KPI configuration CSV:", type=["csv"])
 if uploaded_file:
-    kpi_df = load_kpi_data(uploaded_file)
+    # Parse once per uploaded file; reruns reuse the same table from session state
+    if st.session_state.get("kpi_file_id") != uploaded_file.file_id:
+        kpi_df = load_kpi_data(uploaded_file)
+        if kpi_df is not None:
+            st.session_state.kpi_df = kpi_df
+            st.session_state.kpi_file_id = uploaded_file.file_id
+    else:
+        kpi_df = st.session_state.kpi_df
     if kpi_df is not None:
         st.write("KPI Configuration Loaded:")
         st.dataframe(kpi_df)
@@ -40,22 +139,32 @@ if uploaded_file:
         data_points_str = st.text_input("Enter KPI data points separated by commas (e.g. 10,20,30):")
 
         if kpi_name and data_points_str:
-            try:
-                data_points = [float(x.strip()) for x in data_points_str.split(",")]
-                fig = plot_kpi_graph(kpi_name, data_points)
-                st.pyplot(fig)
-
-                # Export graph as PNG
-                buf = io.BytesIO()
-                fig.savefig(buf, format="png")
-                buf.seek(0)
-                
-                st.download_button(
-                    label="Download KPI Graph as PNG",
-                    data=buf,
-                    file_name=f"{kpi_name}_graph.png",
-                    mime="image/png"
-                )
-
-            except ValueError:
-                st.error("Please enter valid numeric data points separated by commas.")
+            data_points = parse_data_points(data_points_str)
+            if data_points is None:
+                message = "Please enter valid numeric data points separated by commas."
+                invalid = invalid_data_points(data_points_str)
+                if invalid:
+                    message += f" Invalid entries: {', '.join(invalid)}"
+                st.error(message)
+            else:
+                # Preview is drawn in the browser by Vega-Lite; no server-side rasterization
+                st.line_chart({kpi_name: data_points}, x_label="Time Period", y_label="Value")
+
+                # Export graph as PNG; rendered only on request and reused until the inputs change
+                graph_key = (kpi_name, data_points_str)
+                if st.button("Prepare PNG", key="prepare_png"):
+                    st.session_state.kpi_graph_png = {
+                        "key": graph_key,
+                        "png": render_kpi_graph_png(kpi_name, data_points),
+                    }
+
+                prepared = st.session_state.get("kpi_graph_png", {})
+                if prepared.get("key") == graph_key:
+                    st.download_button(
+                        label="Download KPI Graph as PNG",
+                        data=prepared["png"],
+                        file_name=f"{kpi_name}_graph.png",
+                        mime="image/png"
+                    )
+                else:
+                    st.info("Click 'Prepare PNG' to render the graph for download.")